@@ -1,11 +1,12 @@
-from urllib.parse import urlencode, quote
-import requests
-from bs4 import BeautifulSoup
+from urllib.parse import urlencode, quote, urlparse
 import json
 import re
-from concurrent.futures import ThreadPoolExecutor
 import logging
-from requests.exceptions import Timeout, RequestException
+from functools import lru_cache
+from hedging import hedged_call
+from listing import Listing
+from pricing import CURRENCY_SYMBOLS, normalize_prices, apply_discount
+from providers import FETCH_WORKERS, Provider, register_provider, run_provider, resolve_date, guest_counts, map_property_types
 
 
 # Configure logging
@@ -69,18 +70,29 @@ def parse_review_count(rating_str):
     except Exception:
         return -1
 
-def fetch_listings_html(url):
-    """Robust HTML fetcher with direct GET request and timeout handling."""
-    headers = {
+@lru_cache(maxsize=None)
+def http_session():
+    """Shared keep-alive session; requests is imported on first use."""
+    import requests
+
+    session = requests.Session()
+    session.headers.update({
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
         'Accept-Language': 'en-US,en;q=0.9',
         'Accept-Encoding': 'gzip, deflate, br',
-    }
-    
+    })
+    adapter = requests.adapters.HTTPAdapter(pool_maxsize=FETCH_WORKERS)
+    session.mount('https://', adapter)
+    return session
+
+
+def fetch_listings_page(url):
+    """Robust HTML fetcher with direct GET request and timeout handling."""
+    from requests.exceptions import Timeout, RequestException
+
     try:
-        response = requests.get(
+        response = http_session().get(
             url,
-            headers=headers,
             timeout=10  # Total timeout (connect + read) in seconds
         )
         response.raise_for_status()  # Raise exception for 4xx/5xx status codes
@@ -94,6 +106,11 @@ def fetch_listings_html(url):
     return None  # Explicit return on failure
 
 
+def fetch_listings_html(url):
+    """Fetch a search page, hedging it if it is slower than usual for the host."""
+    return hedged_call(urlparse(url).netloc, fetch_listings_page, url)
+
+
 
 def find_nested_attribute(data, keys):
     """
@@ -134,6 +151,8 @@ def find_nested_attribute(data, keys):
 
 def extract_listing_data(html):
     """Advanced data extraction with multiple fallback methods."""
+    from bs4 import BeautifulSoup
+
     soup = BeautifulSoup(html, 'html.parser')
     listing_data = []
     
@@ -173,46 +192,40 @@ def extract_listing_data(html):
                             if total_price_str is None:
                                 logger.warning("Price not found in the JSON structure.")
                                 total_price_str = "N/A"
-                            # Price parsing and discount calculation
-                            numeric_price = parse_price(total_price_str) if total_price_str else float('inf')
-                            if numeric_price != float('inf'):
-                                discounted_price = numeric_price * 0.85
-                                currency_symbol = '€' if '€' in total_price_str else '$'
-                                formatted_discounted_price = f"{currency_symbol}{discounted_price:.2f}"
-                            else:
-                                formatted_discounted_price = total_price_str if total_price_str else "N/A"
-                            
                             # Image handling
                             contextual_pictures = result.get('contextualPictures', [])
                             picture_url = contextual_pictures[0].get('picture') if contextual_pictures else None
-                            
-                            listing_data.append({
-                                "Listing ID": listing.get("id"),
-                                "Listing Type": listing.get("listingObjType"),
-                                "Name": listing.get("name"),
-                                "Title": listing.get("title"),
-                                "Average Rating": result.get('avgRatingLocalized'),
-                                "Discounted Price": "",
-                                "Original Price": "",
-                                "Total Price": formatted_discounted_price,
-                                "Picture": picture_url,
-                                "Website": "airbnb",
-                                "Price": discounted_price
-                            })
+
+                            listing_data.append(Listing(
+                                listing_id=listing.get("id"),
+                                listing_type=listing.get("listingObjType"),
+                                name=listing.get("name"),
+                                title=listing.get("title"),
+                                average_rating=result.get('avgRatingLocalized'),
+                                picture=picture_url,
+                                website="airbnb",
+                                price_text=total_price_str,
+                            ))
                         except Exception as e:
                             logger.warning(f"Error processing listing: {str(e)}")
+
+        # Price parsing and discount calculation for the whole page at once
+        amounts, currencies = normalize_prices([l.price_text for l in listing_data])
+        for listing, price, currency in zip(listing_data, apply_discount(amounts).tolist(), currencies):
+            listing.price = price
+            listing.currency = CURRENCY_SYMBOLS[currency]
     
     # Method 3: Fallback to HTML parsing (maintain original structure but won't match old format perfectly)
     if not listing_data:
         for card in soup.select('[data-testid="card-container"]'):
             try:
-                listing_data.append({
-                    "Listing ID": card.get('data-id'),
-                    "Name": safe_get(card.select_one('[data-testid="listing-card-title"]'), ['text'], ''),
-                    "Total Price": safe_get(card.select_one('._1jo4hgw'), ['text'], ''),
-                    "Website": "airbnb",
-                    "url": safe_get(card.select_one('a'), ['href'], ''),
-                })
+                listing_data.append(Listing(
+                    listing_id=card.get('data-id'),
+                    name=safe_get(card.select_one('[data-testid="listing-card-title"]'), ['text'], ''),
+                    price_text=safe_get(card.select_one('._1jo4hgw'), ['text'], ''),
+                    website="airbnb",
+                    url=safe_get(card.select_one('a'), ['href'], ''),
+                ))
             except Exception as e:
                 logger.warning(f"HTML fallback parse error: {str(e)}")
     
@@ -220,152 +233,116 @@ def extract_listing_data(html):
 
 
 
-def enhanced_fetch_listings(url):
-    """Robust listing fetcher with retry logic."""
+# Property Type mapping
+PROPERTY_TYPE_MAPPING = {
+    'apartment': '3',
+    'house': '1',
+    'guesthouse': '2',
+    'hotel': '4',
+}
+
+
+def build_search_urls(filters):
+    """Build the Airbnb search URLs (first two result pages) for the given filters."""
+    # Base URL and common parameters
+    base_url = "https://www.airbnb.es/s/"
+    destination = getattr(filters, 'destination', 'islamabad')
+    destination = destination.rstrip('`')  # Remove any trailing backticks
+    base_url += f"{quote(str(destination), safe='')}/homes?"
+
+    common_params = {
+        'refinement_paths%5B%5D': '%2Fhomes',
+        'flexible_trip_lengths%5B%5D': 'one_week',
+        'price_filter_input_type': '0',
+        'channel': 'EXPLORE',
+        'source': 'structured_search_input_header',
+        'search_type': 'filter_change',
+        'search_mode': 'regular_search',
+        'date_picker_type': 'calendar',
+    }
+
+    # Initialize query parameters with common parameters
+    query_params = common_params.copy()
+    selected_filter_order = []
+
+    # Check-in and check-out dates
+    if getattr(filters, 'checkIn', None):
+        query_params['checkin'] = resolve_date(filters.checkIn, '2025-01-20')
+    if getattr(filters, 'checkOut', None):
+        query_params['checkout'] = resolve_date(filters.checkOut, '2025-01-21')
+
+    # Guests
+    if hasattr(filters, 'guests'):
+        guests = guest_counts(filters, adults='1', children='1')
+        query_params['adults'] = str(guests['adults'])
+        query_params['children'] = str(guests['children'])
+        if guests['infants'] > 0:
+            query_params['infants'] = str(guests['infants'])
+        # Add pets to query parameters if present
+        if guests['pets'] > 0:
+            query_params['pets'] = str(guests['pets'])
+
+    # Property Types
+    for prop_id in map_property_types(filters, PROPERTY_TYPE_MAPPING):
+        query_params.setdefault('l2_property_type_ids%5B%5D', []).append(prop_id)
+        selected_filter_order.append(f'l2_property_type_ids%3A{prop_id}')
+
+    # Bedrooms
+    if getattr(filters, 'bedrooms', 0) > 0:
+        query_params['min_bedrooms'] = str(filters.bedrooms)
+        selected_filter_order.append(f'min_bedrooms%3A{filters.bedrooms}')
+
+    # Pool
+    if getattr(filters, 'hasPool', False):
+        query_params.setdefault('amenities%5B%5D', []).append('7')
+        selected_filter_order.append('amenities%3A7')
+
+    # Add bathrooms to query parameters if present
+    if getattr(filters, 'bathrooms', 0) > 0:
+        bathroom_count = str(filters.bathrooms)
+        query_params['min_bathrooms'] = bathroom_count
+        selected_filter_order.append(f'min_bathrooms%3A{bathroom_count}')
+
+    # Add selected_filter_order to query_params
+    if selected_filter_order:
+        query_params['selected_filter_order%5B%5D'] = selected_filter_order
+
+    # Construct the query string
+    query_string = urlencode(query_params, doseq=True, safe='%')
+
+    # Original URL
+    original_url = f"{base_url}{query_string}"
+
+    # URL with cursor parameter
+    cursor_param = "&cursor=eyJzZWN0aW9uX29mZnNldCI6MCwiaXRlbXNfb2Zmc2V0IjoxOCwidmVyc2lvbiI6MX0%3D"
+    cursor_url = f"{original_url}{cursor_param}"
+
+    return [original_url, cursor_url]
+
+
+def warm_up():
+    """Open a pooled connection to Airbnb before the first search."""
     try:
-        html = fetch_listings_html(url)
-        return extract_listing_data(html)
+        http_session().head("https://www.airbnb.es/", timeout=5)
     except Exception as e:
-        logger.error(f"Critical fetch failure: {str(e)}")
-        return []
+        logger.warning(f"Airbnb warm-up failed: {str(e)}")
 
-def run_airbnb_bot(filters):
-    """Main executor with improved error handling."""
-    try:
-        # Base URL and common parameters
-        base_url = "https://www.airbnb.es/s/"
-        destination = getattr(filters, 'destination', 'islamabad')
-        destination = destination.rstrip('`')  # Remove any trailing backticks
-        base_url += f"{quote(str(destination), safe='')}/homes?"
-
-        common_params = {
-            'refinement_paths%5B%5D': '%2Fhomes',
-            'flexible_trip_lengths%5B%5D': 'one_week',
-            'price_filter_input_type': '0',
-            'channel': 'EXPLORE',
-            'source': 'structured_search_input_header',
-            'search_type': 'filter_change',
-            'search_mode': 'regular_search',
-            'date_picker_type': 'calendar',
-        }
-
-        # Initialize query parameters with common parameters
-        query_params = common_params.copy()
-        selected_filter_order = []
-
-        # Check-in and check-out dates
-        if hasattr(filters, 'checkIn') and filters.checkIn:
-            if isinstance(filters.checkIn, dict):
-                checkin_date = filters.checkIn.get('date') or filters.checkIn.get('full', '').split('T')[0]
-            elif isinstance(filters.checkIn, str):
-                checkin_date = filters.checkIn
-            else:
-                checkin_date = '2025-01-20'  # Default or handle as needed
-            query_params['checkin'] = checkin_date
-
-        if hasattr(filters, 'checkOut') and filters.checkOut:
-            if isinstance(filters.checkOut, dict):
-                checkout_date = filters.checkOut.get('date') or filters.checkOut.get('full', '').split('T')[0]
-            elif isinstance(filters.checkOut, str):
-                checkout_date = filters.checkOut
-            else:
-                checkout_date = '2025-01-21'  # Default or handle as needed
-            query_params['checkout'] = checkout_date
-
-        # Guests
-        if hasattr(filters, 'guests'):
-            guests = getattr(filters, 'guests', {})
-            query_params['adults'] = str(guests.get('adults', '1'))
-            query_params['children'] = str(guests.get('children', '1'))
-            infants = guests.get('infants', 0)
-            if infants > 0:
-                query_params['infants'] = str(infants)
 
-        # Add pets to query parameters if present
-        if hasattr(filters, 'guests') and filters.guests.get('pets', 0) > 0:
-            query_params['pets'] = str(filters.guests.get('pets'))
-
-        # Property Type mapping
-        property_type_mapping = {
-            'apartment': '3',
-            'house': '1',
-            'guesthouse': '2',
-            'hotel': '4',
-        }
-
-        # Property Types
-        if hasattr(filters, 'propertyType'):
-            property_types = getattr(filters, 'propertyType', [])
-            for prop_type in property_types:
-                # Convert property type to lowercase
-                prop_type_lower = str(prop_type).lower()
-                if prop_type_lower in property_type_mapping:
-                    prop_id = property_type_mapping[prop_type_lower]
-                    if 'l2_property_type_ids%5B%5D' not in query_params:
-                        query_params['l2_property_type_ids%5B%5D'] = []
-                    query_params['l2_property_type_ids%5B%5D'].append(prop_id)
-                    selected_filter_order.append(f'l2_property_type_ids%3A{prop_id}')
-
-        # Bedrooms
-        if hasattr(filters, 'bedrooms') and filters.bedrooms > 0:
-            query_params['min_bedrooms'] = str(filters.bedrooms)
-            selected_filter_order.append(f'min_bedrooms%3A{filters.bedrooms}')
-
-        # Pool
-        if hasattr(filters, 'hasPool') and filters.hasPool:
-            if 'amenities%5B%5D' not in query_params:
-                query_params['amenities%5B%5D'] = []
-            query_params['amenities%5B%5D'].append('7')
-            selected_filter_order.append('amenities%3A7')
-
-
-        # Add bathrooms to query parameters if present
-        if hasattr(filters, 'bathrooms') and filters.bathrooms > 0:
-            bathroom_count = str(filters.bathrooms)
-            query_params['min_bathrooms'] = bathroom_count
-            selected_filter_order.append(f'min_bathrooms%3A{bathroom_count}')
-
-        # Add selected_filter_order to query_params
-        if selected_filter_order:
-            query_params['selected_filter_order%5B%5D'] = selected_filter_order
-
-        # Construct the query string
-        query_string = urlencode(query_params, doseq=True, safe='%')
-
-        # Original URL
-        original_url = f"{base_url}{query_string}"
-        
-        # print(original_url)
-        # original_result = fetch_and_parse_listings(original_url)
-        # URL with cursor parameter
-        cursor_param = "&cursor=eyJzZWN0aW9uX29mZnNldCI6MCwiaXRlbXNfb2Zmc2V0IjoxOCwidmVyc2lvbiI6MX0%3D"
-        cursor_url = f"{original_url}{cursor_param}"
-        
-        # Fetch from multiple pages
-        with ThreadPoolExecutor(max_workers=3) as executor:
-            futures = [
-                executor.submit(enhanced_fetch_listings, original_url),
-                executor.submit(enhanced_fetch_listings, cursor_url)
-            ]
-            results = [f.result() for f in futures]
-        
-        all_listings = [item for sublist in results for item in sublist]
-        
-        # Find best options
-        valid_listings = [l for l in all_listings if l['Price'] != float('inf')]
-        cheapest = min(valid_listings, key=lambda x: x['Price'], default=None)
-        
-        if cheapest:
-            # Extract listing URL from global HTML
-            listing_id = cheapest.get("Listing ID")
-            cheapest["Listing URL"] = f"https://www.airbnb.es/rooms/{listing_id}"
-         
-        
-        return {
-            "cheapest": cheapest
-        }
-        
-    except Exception as e:
-        logger.error(f"Critical error in bot execution: {str(e)}")
-        return {"error": "Failed to retrieve listings"}
+def listing_url(listing, html):
+    """Airbnb room URLs are derived from the listing ID alone."""
+    return f"https://www.airbnb.es/rooms/{listing.listing_id}"
+
+
+register_provider(Provider(
+    name="airbnb",
+    build_urls=build_search_urls,
+    fetch=fetch_listings_html,
+    parse=extract_listing_data,
+    listing_url=listing_url,
+    warm_up=warm_up,
+))
 
+
+def run_airbnb_bot(filters):
+    """Main executor with improved error handling."""
+    return run_provider("airbnb", filters)
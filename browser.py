@@ -0,0 +1,193 @@
+from concurrent.futures import Future
+import logging
+import os
+import queue
+import threading
+
+from resources import Overloaded
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Each worker thread owns one long-lived Chromium; jobs on a worker run one at a time,
+# so this also caps live browsers and open contexts
+BROWSER_WORKERS = int(os.environ.get("BROWSER_WORKERS", "2"))
+# Browser jobs waiting across all workers before new ones are shed
+MAX_BROWSER_QUEUE = int(os.environ.get("MAX_BROWSER_QUEUE", "16"))
+# Longest a caller waits for one browser job: queueing, a possible launch and a 5 s navigation
+JOB_TIMEOUT = float(os.environ.get("BROWSER_JOB_TIMEOUT", "30"))
+
+LAUNCH_OPTIONS = {
+    "headless": True,
+    "args": [
+        '--no-sandbox',
+        '--disable-gpu',
+        '--disable-dev-shm-usage',
+        '--disable-extensions',
+        '--disable-background-networking',
+        '--disable-sync',
+        '--disable-translate',
+        '--no-first-run',
+        '--mute-audio',
+        '--disable-setuid-sandbox',
+        '--single-process',
+    ],
+}
+
+
+class _BrowserWorker(threading.Thread):
+    """Thread that owns a Playwright instance and runs browser jobs on it.
+
+    Playwright's sync API is bound to the thread that started it, so the
+    browser is launched and used only from here. All workers pull from the
+    shared job queue, so a job goes to whichever worker is free first.
+    """
+
+    def __init__(self, index):
+        super().__init__(name=f"browser-{index}", daemon=True)
+        self.browser_live = False
+        self.busy = False
+        self.error = None
+
+    def run(self):
+        try:
+            from playwright.sync_api import sync_playwright
+
+            playwright = sync_playwright().start()
+        except Exception as e:
+            logger.error(f"{self.name}: Playwright failed to start: {e}")
+            self.error = e
+            _worker_died()
+            return
+
+        browser = None
+        try:
+            while True:
+                job = _jobs.get()
+                if job is None:
+                    break
+                func, future = job
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    self.busy = True
+                    if browser is None or not browser.is_connected():
+                        browser = playwright.chromium.launch(**LAUNCH_OPTIONS)
+                        logger.info(f"{self.name}: launched Chromium")
+                    self.browser_live = True
+                    future.set_result(func(browser))
+                except Exception as e:
+                    future.set_exception(e)
+                finally:
+                    self.busy = False
+                    self.browser_live = browser is not None and browser.is_connected()
+        finally:
+            if browser is not None:
+                browser.close()
+            playwright.stop()
+            self.browser_live = False
+
+
+_jobs = queue.Queue()
+_workers = []
+_workers_lock = threading.Lock()
+
+
+def _ensure_workers():
+    with _workers_lock:
+        if not _workers:
+            for index in range(max(1, BROWSER_WORKERS)):
+                worker = _BrowserWorker(index)
+                _workers.append(worker)
+                worker.start()
+
+
+def _startup_error():
+    """Return the startup error if every worker has died, else None. Call with _workers_lock held."""
+    if _workers and all(w.error is not None for w in _workers):
+        return _workers[0].error
+    return None
+
+
+def _worker_died():
+    """Fail all queued jobs once no worker is left to run them."""
+    with _workers_lock:
+        error = _startup_error()
+        if error is None:
+            return
+        while True:
+            try:
+                job = _jobs.get_nowait()
+            except queue.Empty:
+                break
+            if job is not None and job[1].set_running_or_notify_cancel():
+                job[1].set_exception(error)
+
+
+def submit(func):
+    """Schedule `func(browser)` on a free browser worker and return a Future.
+
+    Raises Overloaded when MAX_BROWSER_QUEUE jobs are already waiting, and
+    the startup error when no worker could start Playwright.
+    """
+    _ensure_workers()
+    with _workers_lock:
+        error = _startup_error()
+        if error is not None:
+            raise RuntimeError(f"Browser workers are not running: {error}")
+        if _jobs.qsize() >= MAX_BROWSER_QUEUE:
+            raise Overloaded("Browser queue is full")
+        future = Future()
+        _jobs.put((func, future))
+    return future
+
+
+def run(func, timeout=JOB_TIMEOUT):
+    """Run `func(browser)` on a browser worker and return its result.
+
+    Raises TimeoutError if the job has not finished within `timeout` seconds;
+    a job still waiting in the queue is cancelled.
+    """
+    future = submit(func)
+    try:
+        return future.result(timeout=timeout)
+    except TimeoutError:
+        future.cancel()
+        raise
+
+
+def warm_up():
+    """Start the worker threads and launch a browser in each ahead of the first request."""
+    _ensure_workers()
+    # Each job waits at the barrier, so every worker has to take one and launch its browser
+    barrier = threading.Barrier(len(_workers))
+    futures = [submit(lambda browser: barrier.wait(timeout=JOB_TIMEOUT)) for _ in range(len(_workers))]
+    for future in futures:
+        try:
+            future.result(timeout=JOB_TIMEOUT)
+        except Exception as e:
+            logger.warning(f"Browser warm-up failed: {e}")
+            barrier.abort()
+
+
+def usage():
+    """Return live browser, busy worker and queued job counts."""
+    workers = list(_workers)
+    return {
+        "browsers": sum(w.browser_live for w in workers),
+        "max_browsers": max(1, BROWSER_WORKERS),
+        "busy": sum(w.busy for w in workers),
+        "dead_workers": sum(w.error is not None for w in workers),
+        "queued": _jobs.qsize(),
+        "max_queued": MAX_BROWSER_QUEUE,
+    }
+
+
+def shutdown():
+    """Close all browsers and stop the worker threads."""
+    with _workers_lock:
+        for worker in _workers:
+            if worker.error is None:
+                _jobs.put(None)
+        _workers.clear()
@@ -0,0 +1,125 @@
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from collections import defaultdict, deque
+import logging
+import os
+import threading
+import time
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Hedging is off unless HEDGE_REQUESTS=1
+HEDGE_ENABLED = os.environ.get("HEDGE_REQUESTS", "0") == "1"
+# At most this fraction of the last HEDGE_WINDOW requests may get a duplicate, so
+# quiet periods do not bank hedges for a later slow burst
+HEDGE_BUDGET = float(os.environ.get("HEDGE_BUDGET", "0.05"))
+HEDGE_WINDOW = int(os.environ.get("HEDGE_WINDOW", "100"))
+# Latency samples kept per host, and how many are needed before the p95 is trusted
+LATENCY_WINDOW = 200
+MIN_SAMPLES = 20
+# Hedge delay (seconds) used until a host has enough samples
+DEFAULT_DELAY = float(os.environ.get("HEDGE_DEFAULT_DELAY", "2"))
+
+_latencies = defaultdict(lambda: deque(maxlen=LATENCY_WINDOW))
+_stats = defaultdict(int)
+_hedged = deque()  # Request numbers (the "requests" counter) that got a hedge
+_lock = threading.Lock()
+
+_executor = ThreadPoolExecutor(max_workers=int(os.environ.get("HEDGE_WORKERS", "16")), thread_name_prefix="hedge")
+
+
+def _record_latency(host, seconds):
+    with _lock:
+        _latencies[host].append(seconds)
+
+
+def p95(host):
+    """Return the tracked p95 latency for `host`, or None if there are too few samples."""
+    with _lock:
+        samples = sorted(_latencies[host])
+    if len(samples) < MIN_SAMPLES:
+        return None
+    return samples[int(len(samples) * 0.95) - 1]
+
+
+def _take_budget():
+    """Reserve one hedge if that keeps hedges within HEDGE_BUDGET of the last HEDGE_WINDOW requests."""
+    with _lock:
+        requests = _stats["requests"]
+        while _hedged and _hedged[0] <= requests - HEDGE_WINDOW:
+            _hedged.popleft()
+        if len(_hedged) + 1 > HEDGE_BUDGET * min(requests, HEDGE_WINDOW):
+            _stats["hedges_over_budget"] += 1
+            return False
+        _hedged.append(requests)
+        _stats["hedges"] += 1
+        return True
+
+
+def _count(key):
+    with _lock:
+        _stats[key] += 1
+
+
+def stats():
+    """Return hedging counters and the current per-host p95 latencies."""
+    with _lock:
+        snapshot = dict(_stats)
+        hosts = list(_latencies)
+    snapshot["p95"] = {host: p95(host) for host in hosts}
+    return snapshot
+
+
+def _timed(host, func, args):
+    started = time.monotonic()
+    result = func(*args)
+    if result is not None:
+        _record_latency(host, time.monotonic() - started)
+    return result
+
+
+def _first_success(futures):
+    """Wait for the first future that returns a non-None result; return (future, result)."""
+    pending = set(futures)
+    winner, result = None, None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            try:
+                result = future.result()
+            except Exception as e:
+                logger.warning(f"Hedged attempt failed: {str(e)}")
+                continue
+            if result is not None:
+                return future, result
+            winner = future
+    return winner, None
+
+
+def hedged_call(host, func, *args):
+    """Call `func(*args)`, sending a duplicate if it is slower than the host's p95.
+
+    `func` signals failure by returning None. Whichever attempt succeeds first
+    wins; the slower one is cancelled if it has not started, otherwise its
+    result is discarded when it finishes.
+    """
+    if not HEDGE_ENABLED:
+        return _timed(host, func, args)
+
+    _count("requests")
+    primary = _executor.submit(_timed, host, func, args)
+    delay = p95(host) or DEFAULT_DELAY
+    done, _ = wait([primary], timeout=delay)
+    if done or not _take_budget():
+        return primary.result()
+
+    logger.info(f"Hedging request to {host} after {delay:.2f}s")
+    hedge = _executor.submit(_timed, host, func, args)
+    winner, result = _first_success([primary, hedge])
+    for future in (primary, hedge):
+        if future is not winner:
+            future.cancel()
+    if winner is hedge and result is not None:
+        _count("hedge_wins")
+    return result
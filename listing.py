@@ -0,0 +1,66 @@
+from dataclasses import dataclass
+import math
+
+import orjson
+
+
+@dataclass(slots=True)
+class Listing:
+    """Compact listing record shared by the Airbnb and Booking.com parsers.
+
+    Only raw values are stored; the display strings clients expect (e.g.
+    "Total Price") are built in `to_dict` when the response is serialized.
+    """
+    listing_id: object = None
+    website: str = ""
+    name: object = None
+    title: object = None
+    listing_type: object = None
+    average_rating: object = None
+    picture: object = None
+    price: float = math.inf
+    currency: str = "$"
+    price_text: object = None  # Shown as "Total Price" when no numeric price is available
+    url: object = None
+    destination: object = None  # Set on region searches only
+
+    @property
+    def total_price(self):
+        """Formatted price as shown to clients, e.g. "€123.45"."""
+        if math.isinf(self.price):
+            return self.price_text if self.price_text else "N/A"
+        return f"{self.currency}{self.price:.2f}"
+
+    def to_dict(self):
+        """Return the listing using the public field names of the API."""
+        data = {
+            "Listing ID": self.listing_id,
+            "Listing Type": self.listing_type,
+            "Name": self.name,
+            "Title": self.title,
+            "Average Rating": self.average_rating,
+            "Discounted Price": "",
+            "Original Price": "",
+            "Total Price": self.total_price,
+            "Picture": self.picture,
+            "Website": self.website,
+            "Price": self.price,
+            # Only ranked listings are serialized, and their URL lookup has run;
+            # a lookup that found no link is sent as null, as before
+            "Listing URL": self.url,
+        }
+        if self.destination is not None:
+            data["Destination"] = self.destination
+        return data
+
+
+def _default(obj):
+    """orjson fallback for types it does not know natively."""
+    if isinstance(obj, Listing):
+        return obj.to_dict()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(content):
+    """Serialize API content (including Listing records) to JSON bytes."""
+    return orjson.dumps(content, default=_default, option=orjson.OPT_PASSTHROUGH_DATACLASS)
@@ -1,12 +1,62 @@
+import time
+_started = time.perf_counter()  # Measured before the heavier imports below
+
+from contextlib import asynccontextmanager
+import logging
+import os
 from fastapi import FastAPI, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
 from pydantic import BaseModel
+from typing import Optional
 import concurrent.futures
-from airbnb import run_airbnb_bot  # Import the Airbnb bot function
-from booking import run_booking_bot  # Import the Booking.com bot function
+import airbnb  # Registers the Airbnb provider
+import booking  # Registers the Booking.com provider
+import providers
+import regions
+import listing
+import parse_pool
+import browser
+import hedging
+import resources
 from fastapi import Request
 
 
-app = FastAPI()
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Set WARMUP=1 to launch browsers and open connections before serving traffic
+WARMUP = os.environ.get("WARMUP", "0") == "1"
+# Import time above this budget is logged as a warning
+STARTUP_BUDGET_MS = float(os.environ.get("STARTUP_BUDGET_MS", "1500"))
+
+startup_report = {"import_ms": round((time.perf_counter() - _started) * 1000, 1)}
+
+
+class ListingJSONResponse(JSONResponse):
+    """JSON response encoded with orjson; Listing records are formatted here."""
+
+    def render(self, content) -> bytes:
+        return listing.dumps(content)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if WARMUP:
+        warm_started = time.perf_counter()
+        await run_in_threadpool(providers.warm_up)
+        startup_report["warm_up_ms"] = round((time.perf_counter() - warm_started) * 1000, 1)
+    startup_report["ready_ms"] = round((time.perf_counter() - _started) * 1000, 1)
+    logger.info(f"Startup timing: {startup_report}")
+    if startup_report["import_ms"] > STARTUP_BUDGET_MS:
+        logger.warning(f"Import time {startup_report['import_ms']}ms exceeds the {STARTUP_BUDGET_MS:.0f}ms budget")
+    yield
+    browser.shutdown()
+    parse_pool.shutdown()
+
+
+app = FastAPI(default_response_class=ListingJSONResponse, lifespan=lifespan)
 
 # Define the data model for the request body
 class Filters(BaseModel):
@@ -18,15 +68,55 @@ class Filters(BaseModel):
     bedrooms: int
     bathrooms: int
     hasPool: bool
+    providers: Optional[list] = None  # Provider names to query; all registered providers if omitted
+
+
+
+# Region searches take a list of destinations and/or a named region instead of one destination
+class RegionFilters(Filters):
+    destination: str = ""
+    destinations: Optional[list] = None
+    region: Optional[str] = None
 
 
+def selected_providers(filters):
+    """Return the provider names requested in the filters, defaulting to all registered providers."""
+    names = filters.providers or providers.list_providers()
+    unknown = [name for name in names if name not in providers.list_providers()]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown providers: {', '.join(map(str, unknown))}")
+    return names
+
+
+def service_unavailable(e):
+    """503 telling the client when to retry after a resource limit was hit."""
+    return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(resources.RETRY_AFTER)})
+
+
+async def admit():
+    """Take a scrape slot, waiting in the bounded queue if needed; shed with 503 when full."""
+    if resources.admission.try_acquire():
+        return
+    try:
+        ticket = resources.admission.enqueue()
+        await run_in_threadpool(resources.admission.wait, ticket)
+    except resources.Overloaded as e:
+        raise service_unavailable(e)
+
+
+def run_providers(names, filters):
+    """Run the named providers in parallel and return their results keyed by name."""
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(names)) as executor:
+        futures = {name: executor.submit(providers.run_provider, name, filters) for name in names}
+        return {name: future.result() for name, future in futures.items()}
+
 
 # Default home route
 @app.get("/")
 async def home():
     return {"message": "Welcome to the Web Scraping API", "usage": "Send a POST request to /scrape with the appropriate filters to start scraping."}
 
-# API endpoint to receive filters and run both bots in parallel
+# API endpoint to receive filters and run the selected providers in parallel
 @app.post("/scrape")
 async def scrape(request: Request):
     try:
@@ -34,28 +124,72 @@ async def scrape(request: Request):
         filters_data = await request.json()
         filters = Filters(**filters_data)
 
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            airbnb_future = executor.submit(run_airbnb_bot, filters)
-            booking_future = executor.submit(run_booking_bot, filters)
-            concurrent.futures.wait([airbnb_future, booking_future])
-            airbnb_result = airbnb_future.result()
-            booking_result = booking_future.result()
+        names = selected_providers(filters)
 
-
-        combined_results = {
-            "airbnb": airbnb_result,
-            "booking": booking_result,
-        }
+        await admit()
+        try:
+            combined_results = await run_in_threadpool(run_providers, names, filters)
+        finally:
+            resources.admission.release()
         
         #print(combined_results)
 
-        return {"message": "Scraping completed successfully", "results": combined_results}
+        # Returned as a Response so FastAPI skips its generic jsonable_encoder pass
+        return ListingJSONResponse({"message": "Scraping completed successfully", "results": combined_results})
     
 
+    except HTTPException:
+        raise
+    except resources.Overloaded as e:
+        raise service_unavailable(e)
     except Exception as e:
         print("Error in Server:", e)
         raise HTTPException(status_code=500, detail=str(e))
 
+# API endpoint to search several destinations at once, streaming NDJSON results as they finish
+@app.post("/scrape/region")
+async def scrape_region(request: Request):
+    try:
+        filters_data = await request.json()
+        filters = RegionFilters(**filters_data)
+        destinations = regions.resolve_destinations(filters.destinations, filters.region)
+    except KeyError as e:
+        raise HTTPException(status_code=400, detail=f"Unknown region: {e.args[0]}")
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    names = selected_providers(filters)
+
+    searches = [(destination, filters.model_copy(update={"destination": destination})) for destination in destinations]
+
+    await admit()
+    release = resources.admission.releaser()
+
+    def stream():
+        # The slot is held until the last line is sent or the client goes away
+        try:
+            for item in regions.search_region(searches, names):
+                yield listing.dumps(item) + b"\n"
+        finally:
+            release()
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson", background=BackgroundTask(release))
+
+# Per-provider pipeline counters, hedging counters and startup timing
+@app.get("/metrics")
+async def metrics():
+    return {"providers": providers.metrics_snapshot(), "hedging": hedging.stats(), "startup": startup_report}
+
+# Current usage against the configured resource limits
+@app.get("/resources")
+async def resource_usage():
+    return {
+        "requests": resources.admission.usage(),
+        "browsers": browser.usage(),
+        "page_bodies": resources.page_bodies.usage(),
+        "parse_workers": parse_pool.PARSE_WORKERS,
+    }
+
 # Run the server
 if __name__ == "__main__":
     import uvicorn
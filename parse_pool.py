@@ -0,0 +1,138 @@
+import importlib
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def _default_workers():
+    # CPUs this process may run on (respects cpusets), capped because every
+    # spawned worker re-imports the app's main module
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    return min(cpus, 4)
+
+
+# Number of parser processes; 0 parses inline in the calling thread
+PARSE_WORKERS = int(os.environ.get("PARSE_WORKERS", _default_workers()))
+
+# HTML is handed to workers through a file in tmpfs so only the path is pickled.
+# Docker limits /dev/shm to 64 MB unless the container runs with --shm-size; when
+# the buffer directory is full, pages are parsed inline instead.
+BUFFER_DIR = os.environ.get("PARSE_BUFFER_DIR", "/dev/shm" if os.path.isdir("/dev/shm") else None)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Return the shared parse pool, creating it on first use."""
+    global _pool
+    if PARSE_WORKERS <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            # spawn, not fork: the API process runs threads and a browser driver
+            _pool = ProcessPoolExecutor(
+                max_workers=PARSE_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            logger.info(f"Started parse pool with {PARSE_WORKERS} workers")
+        return _pool
+
+
+def shutdown(pool=None):
+    """Stop the parse pool if it was started.
+
+    With `pool`, stop it only if it is still the current pool, so a thread
+    reporting a broken pool cannot close the fresh one another thread made.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None or (pool is not None and pool is not _pool):
+            return
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def _import_modules(module_names):
+    for module_name in module_names:
+        importlib.import_module(module_name)
+
+
+def warm_up(module_names):
+    """Spawn the parse workers and import the parser modules in them."""
+    pool = get_pool()
+    if pool is None:
+        return
+    futures = [pool.submit(_import_modules, sorted(module_names)) for _ in range(PARSE_WORKERS)]
+    for future in futures:
+        future.result()
+
+
+def _parse_from_buffer(module_name, func_name, path, args):
+    """Worker entry point: read the HTML buffer and run the named parser on it."""
+    with open(path, "rb") as f:
+        html = f.read().decode("utf-8", errors="surrogateescape")
+    func = getattr(importlib.import_module(module_name), func_name)
+    return func(html, *args)
+
+
+def parse_html(func, html, *args):
+    """Run `func(html, *args)` in the parse pool and return its result.
+
+    `func` must be a module-level function so workers can import it by name.
+    Falls back to parsing inline when the pool is disabled, broken or shut down.
+    """
+    pool = get_pool()
+    if pool is None or not html:
+        return func(html, *args)
+
+    path = None
+    try:
+        fd, path = tempfile.mkstemp(prefix="parse-", suffix=".html", dir=BUFFER_DIR)
+        with os.fdopen(fd, "wb") as f:
+            f.write(html.encode("utf-8", errors="surrogateescape"))
+    except OSError as e:
+        # Typically ENOSPC from a small /dev/shm
+        logger.warning(f"Could not write parse buffer, parsing inline: {str(e)}")
+        _remove(path)
+        return func(html, *args)
+
+    future = None
+    try:
+        future = pool.submit(_parse_from_buffer, func.__module__, func.__name__, path, args)
+        return future.result()
+    except BrokenProcessPool as e:
+        logger.error(f"Parse pool broken, parsing inline: {str(e)}")
+        shutdown(pool)
+        return func(html, *args)
+    except CancelledError:
+        # The pool was shut down with this job still queued
+        logger.warning("Parse job cancelled by pool shutdown, parsing inline")
+        return func(html, *args)
+    except RuntimeError as e:
+        if future is not None:
+            raise  # Raised by the parser itself
+        # submit() on a pool that was shut down (replaced after a break, or at app shutdown)
+        logger.warning(f"Parse pool unavailable, parsing inline: {str(e)}")
+        return func(html, *args)
+    finally:
+        _remove(path)
+
+
+def _remove(path):
+    if path is None:
+        return
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
@@ -0,0 +1,104 @@
+from functools import lru_cache
+import logging
+import re
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# numpy is imported inside the batch functions to keep it off the API's startup path
+DISCOUNT_RATE = 0.85
+CURRENCY_SYMBOLS = {"EUR": "€", "USD": "$"}
+
+_NON_NUMERIC = re.compile(r'[^\d.,]')
+_FIRST_DIGITS = re.compile(r'\d+')
+
+
+@lru_cache(maxsize=65536)
+def _parse_amount(price_str):
+    """Same rules as airbnb.parse_price, for one hashable price string."""
+    if not price_str:
+        return float('inf')
+
+    try:
+        clean_str = _NON_NUMERIC.sub('', price_str)
+        if not clean_str:
+            return float('inf')
+
+        # Periods as thousand separators (e.g. "1.639")
+        if '.' in clean_str and ',' not in clean_str:
+            parts = clean_str.split('.')
+            if all(len(part) == 3 for part in parts[1:]):
+                clean_str = clean_str.replace('.', '')
+            elif len(parts) == 2 and len(parts[-1]) == 3:
+                clean_str = clean_str.replace('.', '')
+
+        # Comma as decimal separator when it follows the period (e.g. "1.234,56")
+        if ',' in clean_str and '.' in clean_str:
+            if clean_str.index(',') > clean_str.index('.'):
+                clean_str = clean_str.replace('.', '').replace(',', '.')
+            else:
+                clean_str = clean_str.replace(',', '')
+        elif ',' in clean_str:
+            parts = clean_str.split(',')
+            if len(parts) == 2 and parts[1].isdigit():
+                clean_str = f"{parts[0]}.{parts[1]}"
+            else:
+                clean_str = clean_str.replace(',', '')
+
+        return float(clean_str)
+    except Exception as e:
+        logger.warning(f"Price parsing error: {str(e)}")
+        return float('inf')
+
+
+def _currency_code(price_str):
+    return "EUR" if isinstance(price_str, str) and '€' in price_str else "USD"
+
+
+def normalize_prices(price_strings):
+    """Parse raw price strings in bulk.
+
+    Returns a float64 array of amounts (inf where a string has no usable
+    price, exactly as airbnb.parse_price) and a list of currency codes.
+    """
+    import numpy as np
+
+    price_strings = list(price_strings)
+    amounts = np.fromiter(
+        (_parse_amount(s) if isinstance(s, str) else float('inf') for s in price_strings),
+        dtype=np.float64,
+    )
+    currencies = [_currency_code(s) for s in price_strings]
+    return amounts, currencies
+
+
+def extract_tax_amounts(translations):
+    """Bulk version of booking.extract_tax_amount: first run of digits in each string, else 0.
+
+    Values that are not strings count as 0 rather than failing the batch.
+    """
+    import numpy as np
+
+    taxes = []
+    for translation in translations:
+        match = _FIRST_DIGITS.search(translation) if isinstance(translation, str) else None
+        taxes.append(float(match.group(0)) if match else 0.0)
+    return np.asarray(taxes, dtype=np.float64)
+
+
+def apply_discount(amounts, taxes=None, rate=DISCOUNT_RATE, decimals=None):
+    """Return (amounts + taxes) * rate for whole arrays at once.
+
+    With `decimals`, values are rounded with Python's round() so results
+    match the per-item code exactly; numpy's rounding can differ by a cent.
+    """
+    import numpy as np
+
+    totals = np.asarray(amounts, dtype=np.float64)
+    if taxes is not None:
+        totals = totals + np.asarray(taxes, dtype=np.float64)
+    discounted = totals * rate
+    if decimals is None:
+        return discounted
+    return np.array([round(value, decimals) for value in discounted.tolist()], dtype=np.float64)
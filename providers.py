@@ -0,0 +1,302 @@
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor, wait
+from collections import OrderedDict, defaultdict
+import logging
+import os
+import threading
+import time
+
+import parse_pool
+from parse_pool import parse_html
+from resources import Overloaded, page_bodies
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Page fetches share one executor, except for providers with their own fetch_concurrency
+FETCH_WORKERS = int(os.environ.get("FETCH_WORKERS", "8"))
+# Overall time budget (seconds) for one provider run
+SCRAPE_DEADLINE = float(os.environ.get("SCRAPE_DEADLINE", "30"))
+# Ranked listings are cached per search URL set; 0 disables the cache
+CACHE_TTL = float(os.environ.get("SCRAPE_CACHE_TTL", "300"))
+CACHE_SIZE = int(os.environ.get("SCRAPE_CACHE_SIZE", "256"))
+
+
+@dataclass(frozen=True)
+class Provider:
+    """A listing site plugged into the shared scrape pipeline.
+
+    build_urls(filters) -> list of search page URLs
+    fetch(url) -> HTML string or None
+    parse(html) -> list of Listing; must be module-level so it can run in the parse pool
+    listing_url(listing, html) -> URL of a listing, given the page it was found on;
+        called for each page's cheapest listing while the page is in memory
+    warm_up() -> optional; pre-opens connections or browsers at startup
+    fetch_concurrency -> optional; gives the provider its own fetch threads, for
+        fetchers that block on a scarce resource such as a browser; fetches
+        beyond it are shed with Overloaded
+    """
+    name: str
+    build_urls: object
+    fetch: object
+    parse: object
+    listing_url: object = None
+    warm_up: object = None
+    fetch_concurrency: int = None
+
+
+_providers = {}
+
+
+def register_provider(provider):
+    """Add a provider to the registry, replacing any with the same name."""
+    _providers[provider.name] = provider
+
+
+def get_provider(name):
+    """Return the registered provider called `name`, or raise KeyError."""
+    return _providers[name]
+
+
+def list_providers():
+    """Return the names of all registered providers."""
+    return list(_providers)
+
+
+def warm_up():
+    """Start the parse pool and let every provider prime its fetch engine."""
+    parse_pool.warm_up({provider.parse.__module__ for provider in _providers.values()})
+    for provider in _providers.values():
+        if provider.warm_up:
+            started = time.monotonic()
+            provider.warm_up()
+            logger.info(f"{provider.name}: warmed up in {time.monotonic() - started:.2f}s")
+
+
+# --- Filter helpers shared by the URL builders ---
+
+def resolve_date(value, default=None):
+    """Turn a checkIn/checkOut filter (dict or string) into a YYYY-MM-DD string."""
+    if isinstance(value, dict):
+        return value.get('date') or value.get('full', '').split('T')[0]
+    if isinstance(value, str):
+        return value
+    return default
+
+
+def guest_counts(filters, adults, children):
+    """Read the guests filter, using the given provider defaults for adults and children."""
+    guests = getattr(filters, 'guests', None) or {}
+    return {
+        'adults': guests.get('adults', adults),
+        'children': guests.get('children', children),
+        'infants': guests.get('infants', 0),
+        'pets': guests.get('pets', 0),
+        'children_ages': guests.get('children_ages', []),
+    }
+
+
+def map_property_types(filters, mapping):
+    """Translate the propertyType filter through a provider's mapping, skipping unknown types."""
+    mapped = []
+    for prop_type in getattr(filters, 'propertyType', None) or []:
+        prop_type_lower = str(prop_type).lower()
+        if prop_type_lower in mapping:
+            mapped.append(mapping[prop_type_lower])
+    return mapped
+
+
+# --- Metrics ---
+
+_metrics = defaultdict(lambda: defaultdict(int))
+_metrics_lock = threading.Lock()
+
+
+def _record(provider, **counters):
+    with _metrics_lock:
+        for key, value in counters.items():
+            _metrics[provider][key] += value
+
+
+def metrics_snapshot():
+    """Return per-provider counters for runs, pages, cache hits, errors and timings."""
+    with _metrics_lock:
+        return {name: dict(values) for name, values in _metrics.items()}
+
+
+# --- Cache ---
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _cache_get(key):
+    if CACHE_TTL <= 0:
+        return None
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry is None:
+            return None
+        expires, value = entry
+        if expires < time.monotonic():
+            del _cache[key]
+            return None
+        _cache.move_to_end(key)
+        return value
+
+
+def _cache_put(key, value):
+    if CACHE_TTL <= 0:
+        return
+    with _cache_lock:
+        _cache[key] = (time.monotonic() + CACHE_TTL, value)
+        _cache.move_to_end(key)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+# --- Pipeline ---
+
+_fetch_executor = ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix="fetch")
+_provider_executors = {}
+_pending = defaultdict(int)  # Fetches queued or running on each provider's own executor
+_executors_lock = threading.Lock()
+
+
+def _executor_for(provider):
+    """Return the executor a provider's page fetches run on."""
+    if not provider.fetch_concurrency:
+        return _fetch_executor
+    with _executors_lock:
+        executor = _provider_executors.get(provider.name)
+        if executor is None:
+            executor = ThreadPoolExecutor(
+                max_workers=provider.fetch_concurrency,
+                thread_name_prefix=f"fetch-{provider.name}",
+            )
+            _provider_executors[provider.name] = executor
+        return executor
+
+
+def _fetch_done(name):
+    with _executors_lock:
+        _pending[name] -= 1
+
+
+def _submit_fetch(provider, url):
+    """Queue one page fetch; providers with their own executor shed fetches beyond its size."""
+    executor = _executor_for(provider)
+    if not provider.fetch_concurrency:
+        return executor.submit(_fetch_page, provider, url)
+    with _executors_lock:
+        if _pending[provider.name] >= provider.fetch_concurrency:
+            raise Overloaded(f"{provider.name}: too many page fetches in flight")
+        _pending[provider.name] += 1
+    future = executor.submit(_fetch_page, provider, url)
+    future.add_done_callback(lambda f: _fetch_done(provider.name))
+    return future
+
+
+def _fetch_page(provider, url):
+    """Fetch, parse and resolve one search page; returns its listings, or None if the fetch failed.
+
+    Once fetched, the body counts against the page budget until the page's
+    cheapest listing has its URL resolved; the HTML is dropped after. Its
+    length in characters stands in for its size, so the page is not copied
+    just to be measured. The overall cheapest listing is always some page's
+    cheapest.
+    """
+    html = provider.fetch(url)
+    if not html:
+        _record(provider.name, page_failures=1)
+        return None
+    with page_bodies.hold(len(html)):
+        listings = parse_html(provider.parse, html) or []
+        priced = [l for l in listings if l.price != float('inf')]
+        if priced and provider.listing_url:
+            cheapest = min(priced, key=lambda x: x.price)
+            cheapest.url = provider.listing_url(cheapest, html)
+    return listings
+
+
+def collect_listings(name, filters, deadline=None):
+    """Run a provider's search and return its priced listings, cheapest first.
+
+    The cheapest listing has its URL resolved. Pages that have not finished
+    by the deadline are dropped. Raises Overloaded when a resource limit shed
+    any page; such runs are not cached.
+    """
+    provider = get_provider(name)
+    urls = provider.build_urls(filters)
+    cache_key = (name, tuple(urls))
+    cached = _cache_get(cache_key)
+    if cached is not None:
+        _record(name, cache_hits=1)
+        return cached
+
+    started = time.monotonic()
+    timeout = SCRAPE_DEADLINE if deadline is None else max(0, deadline - started)
+    futures = {}
+    try:
+        for url in urls:
+            futures[_submit_fetch(provider, url)] = url
+    except Overloaded:
+        for future in futures:
+            future.cancel()
+        raise
+    done, not_done = wait(futures, timeout=timeout)
+    for future in not_done:
+        future.cancel()
+        logger.warning(f"{name}: page missed the deadline: {futures[future]}")
+    _record(name, pages=len(done), deadline_misses=len(not_done))
+
+    listings = []
+    failed = 0
+    overloaded = None
+    for future in done:
+        try:
+            page_listings = future.result()
+        except Overloaded as e:
+            logger.warning(f"{name}: page shed: {str(e)}")
+            overloaded = e
+            continue
+        except Exception as e:
+            logger.error(f"{name}: page fetch failed: {str(e)}")
+            _record(name, page_failures=1)
+            failed += 1
+            continue
+        if page_listings is None:
+            failed += 1
+            continue
+        listings.extend(page_listings)
+    if overloaded is not None:
+        raise overloaded
+
+    ranked = sorted((l for l in listings if l.price != float('inf')), key=lambda x: x.price)
+
+    _record(name, listings=len(ranked), seconds=time.monotonic() - started)
+    # Only complete runs are cached, so a failed or slow page is retried next time
+    if not not_done and not failed:
+        _cache_put(cache_key, ranked)
+    return ranked
+
+
+def run_provider(name, filters, deadline=None):
+    """Run one provider and return {"cheapest": listing} or {"error": ...}.
+
+    Overloaded is re-raised so callers can shed the request.
+    """
+    _record(name, runs=1)
+    try:
+        listings = collect_listings(name, filters, deadline)
+        return {
+            "cheapest": listings[0] if listings else None
+        }
+    except Overloaded:
+        _record(name, shed=1)
+        raise
+    except Exception as e:
+        _record(name, errors=1)
+        logger.error(f"Critical error in {name} bot execution: {str(e)}")
+        return {"error": "Failed to retrieve listings"}
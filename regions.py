@@ -0,0 +1,83 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import replace
+import logging
+import os
+import time
+
+import providers
+from resources import Overloaded
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Provider x destination searches from all region requests share these workers
+REGION_CONCURRENCY = int(os.environ.get("REGION_CONCURRENCY", "8"))
+# Overall time budget (seconds) for one region search
+REGION_DEADLINE = float(os.environ.get("REGION_DEADLINE", "90"))
+REGION_MAX_DESTINATIONS = int(os.environ.get("REGION_MAX_DESTINATIONS", "25"))
+
+# Named destination groups, keyed by lowercase region name
+REGION_GROUPS = {
+    "costa brava": ["Blanes", "Lloret de Mar", "Tossa de Mar", "Sant Feliu de Guíxols", "Palamós", "Palafrugell", "Begur", "L'Escala", "Roses", "Cadaqués"],
+    "costa del sol": ["Málaga", "Torremolinos", "Benalmádena", "Fuengirola", "Mijas", "Marbella", "Estepona", "Nerja"],
+    "costa blanca": ["Dénia", "Jávea", "Calpe", "Altea", "Benidorm", "Alicante", "Torrevieja"],
+    "mallorca": ["Palma", "Alcúdia", "Pollença", "Sóller", "Cala d'Or", "Santanyí"],
+    "canary islands": ["Las Palmas de Gran Canaria", "Maspalomas", "Santa Cruz de Tenerife", "Puerto de la Cruz", "Costa Adeje", "Puerto del Carmen", "Corralejo"],
+}
+
+_executor = ThreadPoolExecutor(max_workers=REGION_CONCURRENCY, thread_name_prefix="region")
+
+
+def resolve_destinations(destinations=None, region=None):
+    """Combine explicit destinations and a named region into one de-duplicated list.
+
+    Raises KeyError for an unknown region and ValueError for an empty or
+    oversized destination list.
+    """
+    names = list(destinations or [])
+    if region:
+        names.extend(REGION_GROUPS[str(region).strip().lower()])
+    resolved = list(dict.fromkeys(str(name).strip() for name in names if str(name).strip()))
+    if not resolved:
+        raise ValueError("No destinations given")
+    if len(resolved) > REGION_MAX_DESTINATIONS:
+        raise ValueError(f"At most {REGION_MAX_DESTINATIONS} destinations per region search")
+    return resolved
+
+
+def search_region(searches, names):
+    """Run every provider for every (destination, filters) pair and yield results as they finish.
+
+    Yields one {"provider", "destination", ...} dict per search, then a final
+    {"ranking": [...]} with each search's cheapest listing ordered by price.
+    """
+    deadline = time.monotonic() + REGION_DEADLINE
+    futures = {}
+    for destination, filters in searches:
+        for name in names:
+            future = _executor.submit(providers.run_provider, name, filters, deadline)
+            futures[future] = (name, destination)
+
+    ranking = []
+    try:
+        for future in as_completed(futures):
+            name, destination = futures[future]
+            try:
+                result = future.result()
+            except Overloaded:
+                result = {"error": "overloaded"}
+            cheapest = result.get("cheapest")
+            if cheapest is not None:
+                # Ranked listings may be shared with the cache, so tag a copy
+                cheapest = replace(cheapest, destination=destination)
+                ranking.append(cheapest)
+                result = dict(result, cheapest=cheapest)
+            yield dict(result, provider=name, destination=destination)
+    finally:
+        # The client went away or the stream was closed early: drop searches not yet started
+        for future in futures:
+            future.cancel()
+
+    ranking.sort(key=lambda x: x.price)
+    yield {"ranking": ranking}
@@ -0,0 +1,149 @@
+from collections import deque
+from contextlib import contextmanager
+import os
+import threading
+
+
+# Scrape requests served at once; further requests wait in a bounded queue
+MAX_ACTIVE_REQUESTS = int(os.environ.get("MAX_ACTIVE_REQUESTS", "4"))
+MAX_QUEUED_REQUESTS = int(os.environ.get("MAX_QUEUED_REQUESTS", "16"))
+QUEUE_TIMEOUT = float(os.environ.get("QUEUE_TIMEOUT", "30"))
+# Seconds clients are told to wait when a request is shed
+RETRY_AFTER = int(os.environ.get("RETRY_AFTER", "10"))
+# Total length (characters) of page bodies being parsed or used for listing URL lookup.
+# A body is counted only once its reservation is granted, so bodies still downloading
+# or waiting for budget are bounded by the number of fetch threads, not by this
+MAX_INFLIGHT_PAGE_BYTES = int(os.environ.get("MAX_INFLIGHT_PAGE_BYTES", str(64 * 1024 * 1024)))
+PAGE_BUDGET_TIMEOUT = float(os.environ.get("PAGE_BUDGET_TIMEOUT", "30"))
+
+
+class Overloaded(Exception):
+    """Raised when a resource limit is reached and the work is shed instead of queued."""
+
+
+class Admission:
+    """Limits how many scrape requests run at once, with a bounded FIFO wait queue.
+
+    Freed slots go to queued requests in arrival order; new arrivals only
+    take a slot directly when nobody is waiting.
+    """
+
+    def __init__(self, max_active, max_queued, queue_timeout):
+        self.max_active = max_active
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self._cond = threading.Condition()
+        self._waiters = deque()
+        self.active = 0
+        self.queued = 0
+        self.admitted = 0
+        self.rejected = 0
+
+    def try_acquire(self):
+        """Take a slot if one is free and no request is queued ahead."""
+        with self._cond:
+            if self._waiters or self.active >= self.max_active:
+                return False
+            self._admit()
+            return True
+
+    def enqueue(self):
+        """Reserve a place in the wait queue and return its ticket, or raise Overloaded if it is full."""
+        with self._cond:
+            if len(self._waiters) >= self.max_queued:
+                self.rejected += 1
+                raise Overloaded("Request queue is full")
+            ticket = object()
+            self._waiters.append(ticket)
+            self.queued = len(self._waiters)
+            return ticket
+
+    def wait(self, ticket):
+        """Block until `ticket` reaches the front of the queue and a slot is free; raise Overloaded on timeout."""
+        with self._cond:
+            turn = lambda: self._waiters[0] is ticket and self.active < self.max_active
+            acquired = self._cond.wait_for(turn, timeout=self.queue_timeout)
+            self._waiters.remove(ticket)
+            self.queued = len(self._waiters)
+            # Let the next waiter re-check: it may now be at the front, with a slot free
+            self._cond.notify_all()
+            if not acquired:
+                self.rejected += 1
+                raise Overloaded("Timed out waiting for a free slot")
+            self._admit()
+
+    def release(self):
+        with self._cond:
+            self.active -= 1
+            self._cond.notify_all()
+
+    def releaser(self):
+        """Return a callable that releases this slot at most once, however often it is called."""
+        released = threading.Event()
+        lock = threading.Lock()
+
+        def release_once():
+            with lock:
+                if released.is_set():
+                    return
+                released.set()
+            self.release()
+
+        return release_once
+
+    def _admit(self):
+        """Count a newly admitted request. Call with _cond held."""
+        self.active += 1
+        self.admitted += 1
+
+    def usage(self):
+        with self._cond:
+            return {
+                "active": self.active,
+                "queued": self.queued,
+                "max_active": self.max_active,
+                "max_queued": self.max_queued,
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+            }
+
+
+class ByteBudget:
+    """Caps the total size of page bodies held in memory at once."""
+
+    def __init__(self, limit, timeout):
+        self.limit = limit
+        self.timeout = timeout
+        self.in_use = 0
+        self.peak = 0
+        self.rejected = 0
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def hold(self, size):
+        """Reserve `size` bytes for the duration of the block.
+
+        A body larger than the whole budget is let through once nothing else
+        is held, so oversized pages are slow rather than impossible.
+        """
+        with self._cond:
+            fits = lambda: self.in_use + size <= self.limit or self.in_use == 0
+            if not self._cond.wait_for(fits, timeout=self.timeout):
+                self.rejected += 1
+                raise Overloaded(f"Page body budget exhausted ({self.in_use} bytes in flight)")
+            self.in_use += size
+            self.peak = max(self.peak, self.in_use)
+        try:
+            yield
+        finally:
+            with self._cond:
+                self.in_use -= size
+                self._cond.notify_all()
+
+    def usage(self):
+        with self._cond:
+            return {"in_use": self.in_use, "limit": self.limit, "peak": self.peak, "rejected": self.rejected}
+
+
+admission = Admission(MAX_ACTIVE_REQUESTS, MAX_QUEUED_REQUESTS, QUEUE_TIMEOUT)
+page_bodies = ByteBudget(MAX_INFLIGHT_PAGE_BYTES, PAGE_BUDGET_TIMEOUT)
@@ -0,0 +1,99 @@
+from concurrent.futures import ThreadPoolExecutor
+import itertools
+import logging
+import time
+
+import pytest
+
+import hedging
+
+
+@pytest.fixture(autouse=True)
+def hedging_state(monkeypatch):
+    monkeypatch.setattr(hedging, "HEDGE_ENABLED", True)
+    monkeypatch.setattr(hedging, "HEDGE_BUDGET", 0.05)
+    monkeypatch.setattr(hedging, "HEDGE_WINDOW", 100)
+    hedging._latencies.clear()
+    hedging._stats.clear()
+    hedging._hedged.clear()
+    logging.disable(logging.WARNING)
+    yield
+    logging.disable(logging.NOTSET)
+
+
+@pytest.fixture
+def executor():
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        yield pool
+
+
+def _after(seconds, value=None, error=None):
+    def call():
+        time.sleep(seconds)
+        if error is not None:
+            raise error
+        return value
+    return call
+
+
+def test_budget_is_not_banked_by_fast_requests(monkeypatch):
+    monkeypatch.setattr(hedging, "p95", lambda host: 1.0)
+    for _ in range(2000):
+        hedging.hedged_call("example.com", lambda: "page")
+    assert hedging.stats().get("hedges", 0) == 0
+
+    monkeypatch.setattr(hedging, "p95", lambda host: 0.001)
+    for _ in range(100):
+        hedging.hedged_call("example.com", _after(0.01, "page"))
+
+    stats = hedging.stats()
+    assert stats["hedges"] == 5
+    # Nearly all of the rest; a primary can finish before a late-waking timer fires
+    assert stats["hedges_over_budget"] >= 90
+
+
+def test_budget_frees_up_as_hedges_leave_the_window():
+    granted = []
+    for _ in range(300):
+        hedging._count("requests")
+        granted.append(hedging._take_budget())
+
+    assert sum(granted) == 15
+    assert all(sum(granted[i:i + 100]) <= 5 for i in range(200))
+
+
+def test_first_success_prefers_a_fast_hedge_over_a_slow_primary(executor):
+    primary = executor.submit(_after(0.3, "primary"))
+    hedge = executor.submit(_after(0.01, "hedge"))
+
+    winner, result = hedging._first_success([primary, hedge])
+
+    assert winner is hedge and result == "hedge"
+
+
+def test_first_success_skips_a_failing_primary(executor):
+    primary = executor.submit(_after(0.01, error=ConnectionError("reset")))
+    hedge = executor.submit(_after(0.05, "hedge"))
+
+    winner, result = hedging._first_success([primary, hedge])
+
+    assert winner is hedge and result == "hedge"
+
+
+def test_hedge_wins_counts_only_hedges_that_answer_first(monkeypatch):
+    monkeypatch.setattr(hedging, "p95", lambda host: 0.01)
+    for _ in range(40):
+        hedging._count("requests")
+    attempts = itertools.count()
+
+    def fetch():
+        # First attempt is the slow primary, second the hedge
+        return _after(0.3, "primary")() if next(attempts) == 0 else "hedge"
+
+    assert hedging.hedged_call("example.com", fetch) == "hedge"
+    monkeypatch.setattr(hedging, "p95", lambda host: 1.0)
+    assert hedging.hedged_call("example.com", lambda: "primary") == "primary"
+
+    stats = hedging.stats()
+    assert stats["hedges"] == 1
+    assert stats["hedge_wins"] == 1
@@ -0,0 +1,68 @@
+import orjson
+
+from listing import Listing, dumps
+
+
+def test_airbnb_record_matches_the_wire_format():
+    listing = Listing(
+        listing_id="123",
+        listing_type="REPRESENTATIVE",
+        name="Sea view flat",
+        title="Flat in Roses",
+        average_rating="4.9 (12)",
+        picture="https://a0.muscache.com/im/pictures/1.jpg",
+        website="airbnb",
+        price=1393.15,
+        currency="€",
+        price_text="€1.639 total",
+        url="https://www.airbnb.es/rooms/123",
+    )
+
+    assert listing.to_dict() == {
+        "Listing ID": "123",
+        "Listing Type": "REPRESENTATIVE",
+        "Name": "Sea view flat",
+        "Title": "Flat in Roses",
+        "Average Rating": "4.9 (12)",
+        "Discounted Price": "",
+        "Original Price": "",
+        "Total Price": "€1393.15",
+        "Picture": "https://a0.muscache.com/im/pictures/1.jpg",
+        "Website": "airbnb",
+        "Price": 1393.15,
+        "Listing URL": "https://www.airbnb.es/rooms/123",
+    }
+
+
+def test_booking_record_without_a_link_sends_a_null_url():
+    listing = Listing(
+        listing_id=42,
+        name="Hotel Sol",
+        title="Hotel Sol",
+        average_rating="8.7 (310)",
+        picture="https://cf.bstatic.com/xdata/images/hotel/max800/1.jpg",
+        website="booking",
+        price=282.2,
+        currency="€",
+    )
+
+    assert orjson.loads(dumps({"cheapest": listing})) == {"cheapest": {
+        "Listing ID": 42,
+        "Listing Type": None,
+        "Name": "Hotel Sol",
+        "Title": "Hotel Sol",
+        "Average Rating": "8.7 (310)",
+        "Discounted Price": "",
+        "Original Price": "",
+        "Total Price": "€282.20",
+        "Picture": "https://cf.bstatic.com/xdata/images/hotel/max800/1.jpg",
+        "Website": "booking",
+        "Price": 282.2,
+        "Listing URL": None,
+    }}
+
+
+def test_region_results_add_the_destination():
+    data = Listing(listing_id=1, website="airbnb", price=10.0, destination="Roses").to_dict()
+    assert data["Destination"] == "Roses"
+    assert list(data)[-2:] == ["Listing URL", "Destination"]
@@ -0,0 +1,101 @@
+import json
+import logging
+import math
+import random
+
+import pytest
+
+from airbnb import parse_price
+from booking import extract_tax_amount, parse_html_and_extract_results
+from pricing import apply_discount, extract_tax_amounts, normalize_prices
+
+
+CURRENCY_MARKS = ['€', '$', '£', 'US$', ' EUR', '€ ', '']
+ODD_STRINGS = ['', 'N/A', '€', '..', ',', '1.2.3', '1,2,3', '12.345', '1.23', '€ 1.234 total', '$1,639 total', '1.234,56', '1,234.56']
+
+
+def _random_price(rng):
+    """One price string in one of the formats the sites produce, or noise."""
+    n = rng.choice([rng.randint(0, 99), rng.randint(100, 9999), rng.randint(1000, 10**7)])
+    kind = rng.random()
+    if kind < 0.2:
+        number = f"{n:,}"
+    elif kind < 0.4:
+        number = f"{n:,}".replace(',', '.')
+    elif kind < 0.55:
+        number = f"{n:,}.{rng.randint(0, 99):02d}"
+    elif kind < 0.7:
+        number = f"{n:,}".replace(',', '.') + f",{rng.randint(0, 99):02d}"
+    elif kind < 0.8:
+        number = f"{n},{rng.randint(0, 999)}"
+    elif kind < 0.9:
+        number = ''.join(rng.choice('0123456789.,€$ abc') for _ in range(rng.randint(0, 12)))
+    else:
+        number = rng.choice(ODD_STRINGS)
+    mark = rng.choice(CURRENCY_MARKS)
+    return mark + number if rng.random() < 0.7 else f"{number} {mark}"
+
+
+@pytest.fixture(scope="module")
+def corpus():
+    rng = random.Random(20250101)
+    return [_random_price(rng) for _ in range(200_000)] + ODD_STRINGS + [None, 5, 12.5, b'12', ['1']]
+
+
+@pytest.fixture(autouse=True)
+def quiet_price_warnings():
+    logging.disable(logging.WARNING)
+    yield
+    logging.disable(logging.NOTSET)
+
+
+def test_normalize_prices_matches_parse_price(corpus):
+    amounts, currencies = normalize_prices(corpus)
+
+    assert len(amounts) == len(currencies) == len(corpus)
+    for price_str, amount, currency in zip(corpus, amounts.tolist(), currencies):
+        expected = parse_price(price_str)
+        assert amount == expected or (math.isnan(amount) and math.isnan(expected)), price_str
+        assert currency == ("EUR" if isinstance(price_str, str) and '€' in price_str else "USD"), price_str
+
+
+def test_extract_tax_amounts_matches_extract_tax_amount():
+    translations = ['+€ 12 taxes', 'Includes taxes', '+ 3,45 fees', '', None, 'US$1,639 in charges', '€ 0 tax']
+    taxes = extract_tax_amounts(translations).tolist()
+    assert taxes == [float(extract_tax_amount(t)) for t in translations]
+
+
+def test_extract_tax_amounts_treats_non_strings_as_zero():
+    assert extract_tax_amounts(['+€ 12 taxes', {'amount': 5}, 7, b'12', '€ 3 tax']).tolist() == [12.0, 0.0, 0.0, 0.0, 3.0]
+
+
+def test_booking_page_skips_only_the_listing_with_a_bad_translation():
+    def result(listing_id, amount, translation):
+        return {
+            "basicPropertyData": {"id": listing_id},
+            "displayName": {"text": f"Stay {listing_id}"},
+            "priceDisplayInfoIrene": {"displayPrice": {"amountPerStay": {"amount": f"€ {amount}", "amountUnformatted": amount}}},
+            "chargesInfo": {"translation": translation},
+        }
+
+    results = [result(1, 320, '+€ 12 taxes'), result(2, 150, {'text': '+€ 9 taxes'}), result(3, 400, 42)]
+    html = f'<script data-capla-store-data="apollo">{json.dumps({"results": results})}</script>'
+
+    listings = parse_html_and_extract_results(html)
+
+    assert [(l.listing_id, l.price) for l in listings] == [(1, 282.2)]
+
+
+def test_apply_discount_matches_per_item_rounding():
+    rng = random.Random(7)
+    amounts = [rng.choice([rng.randint(10, 5000), round(rng.uniform(10, 5000), 2)]) for _ in range(50_000)]
+    taxes = [rng.choice([0, rng.randint(1, 300)]) for _ in amounts]
+
+    discounted = apply_discount(amounts, taxes, decimals=2).tolist()
+
+    assert discounted == [round((a + t) * 0.85, 2) for a, t in zip(amounts, taxes)]
+
+
+def test_apply_discount_without_rounding_keeps_infinite_prices():
+    discounted = apply_discount([100.0, float('inf')]).tolist()
+    assert discounted == [100.0 * 0.85, float('inf')]
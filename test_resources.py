@@ -0,0 +1,117 @@
+import threading
+import time
+
+import pytest
+
+from resources import Admission, ByteBudget, Overloaded
+
+
+def _start(target, *args):
+    thread = threading.Thread(target=target, args=args, daemon=True)
+    thread.start()
+    return thread
+
+
+def test_admission_sheds_when_the_queue_is_full():
+    admission = Admission(max_active=1, max_queued=1, queue_timeout=1)
+    assert admission.try_acquire()
+    assert not admission.try_acquire()
+    admission.enqueue()
+
+    with pytest.raises(Overloaded):
+        admission.enqueue()
+    assert admission.usage()["rejected"] == 1
+
+
+def test_admission_times_out_a_queued_request():
+    admission = Admission(max_active=1, max_queued=4, queue_timeout=0.05)
+    assert admission.try_acquire()
+    ticket = admission.enqueue()
+
+    with pytest.raises(Overloaded):
+        admission.wait(ticket)
+    assert admission.usage() == {
+        "active": 1, "queued": 0, "max_active": 1, "max_queued": 4, "admitted": 1, "rejected": 1,
+    }
+
+
+def test_admission_serves_queued_requests_before_new_arrivals():
+    admission = Admission(max_active=1, max_queued=4, queue_timeout=2)
+    assert admission.try_acquire()
+    order = []
+
+    def queued(name):
+        admission.wait(tickets[name])
+        order.append(name)
+        admission.release()
+
+    tickets = {name: admission.enqueue() for name in ("first", "second")}
+    threads = [_start(queued, name) for name in tickets]
+
+    admission.release()
+    # A slot frees up while requests are queued: a newcomer must not take it
+    assert not admission.try_acquire()
+    for thread in threads:
+        thread.join(timeout=2)
+
+    assert order == ["first", "second"]
+    assert admission.try_acquire()
+
+
+def test_admission_releaser_releases_once():
+    admission = Admission(max_active=1, max_queued=0, queue_timeout=1)
+    assert admission.try_acquire()
+    release = admission.releaser()
+
+    release()
+    release()
+
+    assert admission.usage()["active"] == 0
+    assert admission.try_acquire()
+    assert not admission.try_acquire()
+
+
+def test_byte_budget_waits_for_room_and_frees_it_on_exit():
+    budget = ByteBudget(limit=100, timeout=2)
+    entered = threading.Event()
+
+    def second():
+        with budget.hold(60):
+            entered.set()
+
+    with budget.hold(60):
+        thread = _start(second)
+        time.sleep(0.05)
+        assert not entered.is_set()
+        assert budget.usage()["in_use"] == 60
+    thread.join(timeout=2)
+
+    assert entered.is_set()
+    assert budget.usage() == {"in_use": 0, "limit": 100, "peak": 60, "rejected": 0}
+
+
+def test_byte_budget_sheds_after_the_timeout():
+    budget = ByteBudget(limit=100, timeout=0.05)
+    with budget.hold(80):
+        with pytest.raises(Overloaded):
+            with budget.hold(30):
+                pass
+    assert budget.usage()["rejected"] == 1
+
+
+def test_byte_budget_lets_an_oversized_body_through_alone():
+    budget = ByteBudget(limit=100, timeout=1)
+    done = threading.Event()
+
+    def oversized():
+        with budget.hold(500):
+            done.set()
+
+    with budget.hold(10):
+        thread = _start(oversized)
+        time.sleep(0.05)
+        assert not done.is_set()
+    thread.join(timeout=2)
+
+    assert done.is_set()
+    assert budget.usage()["peak"] == 500